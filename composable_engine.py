@@ -1,121 +1,159 @@
-def composable_engine(state_definitions, initial_state="__start__", debug_mode=False):
+import inspect
+import sys
+
+_END_STATE = sys.intern("__end__") # Interned so the end-of-machine check can compare by identity
+_STATE_DONE = object() # next() default marking an exhausted state generator, so completion is not signalled by StopIteration
+
+
+def _intern_state_name(state_name):
+    """Intern a state name so it can be compared by identity (None is passed through)."""
+    # sys.intern only accepts exact str; str.__str__ gives a subclass's plain value even if it overrides __str__ (e.g. (str, Enum))
+    return sys.intern(str.__str__(state_name)) if isinstance(state_name, str) else state_name
+
+
+class _MachineContext:
+    """Execution context of one (sub-)machine on the engine stack."""
+    __slots__ = ("state_def", "current_state_name", "state_generator", "next_state", "pending_input") # Fixed layout: no per-context __dict__
+
+    def __init__(self, state_def, current_state_name):
+        self.state_def = state_def
+        self.current_state_name = current_state_name
+        self.state_generator = None # Generator is initialized when the engine enters the state
+        self.next_state = None # Transition requested by the running state, applied when it finishes
+        self.pending_input = None # Runner input answering the running state's request_input, sent on its next resume
+
+
+def _validate_state_definitions(state_definitions):
+    """Fail fast on malformed machines instead of discovering them mid-run."""
     if "__start__" not in state_definitions:
         raise ValueError("State machine must have a '__start__' state.")
     if "__end__" not in state_definitions:
         raise ValueError("State machine must have an '__end__' state.")
+    for state_name, state_definition in state_definitions.items():
+        if isinstance(state_definition, dict): # Sub-machines must satisfy the same rules
+            _validate_state_definitions(state_definition)
+        elif not callable(state_definition):
+            raise ValueError(f"Invalid state definition for '{state_name}'. Must be function or dict.")
 
+
+def composable_engine(state_definitions, initial_state="__start__", debug_mode=False):
+    """Validate the machine, then return the engine generator that runs it."""
+    _validate_state_definitions(state_definitions) # Runs on the call itself, before the runner first advances the engine
+    return _run_engine(state_definitions, initial_state, debug_mode)
+
+
+def _run_engine(state_definitions, initial_state, debug_mode):
     engine_stack = [ # Stack to manage state machines (can be main machine or sub-machines)
-        {"state_def": state_definitions, "current_state_name": initial_state, "state_generator": None}
+        _MachineContext(state_definitions, _intern_state_name(initial_state))
     ]
 
-    input_value = None
-
     while engine_stack: # While there are state machines in the stack to process
         current_machine_context = engine_stack[-1] # Get the current machine context from the top of the stack
-        current_state_name = current_machine_context["current_state_name"]
-        state_generator = current_machine_context["state_generator"]
-        state_def = current_machine_context["state_def"]
-
-
-        if current_state_name is None or current_state_name == "__end__":
-            engine_stack.pop() # Sub-machine or main machine finished, pop it from the stack
-            continue # Continue to process the next machine in the stack (if any)
-
-
-        state_definition = state_def[current_state_name] # Get state definition from the *current machine's* definitions
+        current_state_name = current_machine_context.current_state_name
+        state_generator = current_machine_context.state_generator
 
 
         if state_generator is None: # If state generator is not initialized for this state
-            if isinstance(state_definition, dict): # It's a sub-machine definition
+            # A running state always has a real name, so the end check only runs between states.
+            # Only the main machine stops at '__end__'; a sub-machine runs its '__end__' state to pick the parent's next state.
+            if current_state_name is None or (current_state_name is _END_STATE and len(engine_stack) == 1):
+                engine_stack.pop() # Sub-machine or main machine finished, pop it from the stack
+                if engine_stack: # A halted sub-machine halts the parent state that started it, instead of being re-entered
+                    engine_stack[-1].current_state_name = None
+                continue # Continue to process the next machine in the stack (if any)
+
+            state_definition = current_machine_context.state_def.get(current_state_name) # Resolve definition only on state entry; a running state keeps its generator
+            if state_definition is None: # Transition to a state this machine does not define: report it and halt like a failing state
+                machine_name = f"sub-machine '{engine_stack[-2].current_state_name}'" if len(engine_stack) > 1 else "main machine"
+                yield {"instruction": "runner_error", "message": f"Unknown state '{current_state_name}' in {machine_name}.", "payload": {"state": current_state_name}}
+                engine_stack.pop()
+                if engine_stack: # Halt the parent too, otherwise it would re-enter the failed sub-machine
+                    engine_stack[-1].current_state_name = None
+                continue
+            if callable(state_definition): # Called on every entry, the same way for every kind of callable; branch on what it returns
+                sub_machine_definition = None
+                state_result = state_definition(input_data={"instruction_context": None}) # Reserved key; runner input arrives through request_input
+                if inspect.isgenerator(state_result): # State function, including decorated ones, lambdas and callable objects
+                    current_machine_context.state_generator = state_result
+                    state_generator = state_result # Update local reference
+                elif isinstance(state_result, dict): # Function-based sub-machine definition, built for this entry's input_data
+                    _validate_state_definitions(state_result)
+                    sub_machine_definition = state_result
+                else:
+                    raise ValueError(f"State '{current_state_name}' returned {type(state_result).__name__}. Must return a generator or a sub-machine dict.")
+            else: # A dict definition is a sub-machine, already validated with its parent
                 sub_machine_definition = state_definition
+
+            if sub_machine_definition is not None:
                 # Push sub-machine context to the stack - this is composition, NOT recursion
-                engine_stack.append({
-                    "state_def": sub_machine_definition,
-                    "current_state_name": "__start__", # Start sub-machine from __start__
-                    "state_generator": None # Generator will be initialized in the next iteration
-                })
+                engine_stack.append(_MachineContext(sub_machine_definition, "__start__")) # Start sub-machine from __start__
                 continue # Process the new sub-machine at the top of the stack in the next iteration
 
-            elif callable(state_definition): # It's a state function
-                state_function = state_definition
-                current_machine_context["state_generator"] = state_function(input_data={"instruction_context": input_value}) # Initialize generator
-                state_generator = current_machine_context["state_generator"] # Update local reference
-
-            else:
-                raise ValueError(f"Invalid state definition for '{current_state_name}'. Must be function or dict.")
 
+        pending_input = current_machine_context.pending_input
+        try: # Only the state function runs inside the try; engine bookkeeping errors propagate
+            if pending_input is None:
+                yielded_value = next(state_generator, _STATE_DONE)
+            else: # Resume with send() so the state's `x = yield {"instruction": "request_input", ...}` receives the input
+                current_machine_context.pending_input = None
+                yielded_value = state_generator.send(pending_input)
 
-        next_state_name = None
-        parent_transition_info = None
-        last_instruction_from_state = None
-        instruction_result = None
+        except StopIteration: # Only send() signals completion this way; next() returns the sentinel
+            yielded_value = _STATE_DONE
 
+        except Exception as e: # Error in state function
+            yield {"instruction": "runner_error", "message": f"Error in state '{current_state_name}': {e}", "payload": {"exception": str(e)}}
+            current_machine_context.current_state_name = None # Halt current machine on error
+            current_machine_context.state_generator = None
+            engine_stack.pop() # Pop errored machine - could be refined to handle error propagation to parent
+            if engine_stack: # Halt the parent too, otherwise it would re-enter the failed sub-machine
+                engine_stack[-1].current_state_name = None
+            continue # Process next machine from stack or finish if stack is empty
 
-        try:
-            yielded_value = next(state_generator) # Get instruction from current state generator
-            last_instruction_from_state = yielded_value
 
-            if isinstance(yielded_value, dict) and "instruction" in yielded_value:
-                instruction = yielded_value["instruction"]
+        if yielded_value is _STATE_DONE: # State function finished yielding
+            if current_state_name is _END_STATE: # A sub-machine's '__end__' finished: its transition applies to the parent
+                engine_stack.pop()
+                engine_stack[-1].current_state_name = current_machine_context.next_state # No transition halts the parent
+                continue
+            current_machine_context.current_state_name = current_machine_context.next_state # Recorded transition, or None to halt the machine
+            current_machine_context.next_state = None
+            current_machine_context.state_generator = None # Reset generator for next state or next machine in stack
+            continue # Process next state in the current machine or pop from stack if needed
 
-                if instruction == "transition":
-                    next_state_name = yielded_value.get("next_state")
-                    instruction_result = yielded_value
+        if isinstance(yielded_value, dict) and "instruction" in yielded_value:
+            instruction = yielded_value["instruction"]
 
-                elif instruction == "parent_transition":
-                    parent_transition_info = yielded_value
-                    instruction_result = yielded_value
-                    engine_stack.pop() # Pop the current sub-machine from stack as it requests parent transition
-                    if engine_stack: # If there is a parent machine in stack
-                        current_machine_context = engine_stack[-1] # Get parent machine context
-                        current_machine_context["current_state_name"] = parent_transition_info.get("next_state_for_parent") # Set parent's next state
-                    else:
-                        current_state_name = parent_transition_info.get("next_state_for_parent") # For top-level parent transition
-                    continue # Process the transition in the parent machine (or top-level) in next iteration
+            if instruction == "transition": # Last transition wins; it is applied once the state function finishes
+                current_machine_context.next_state = _intern_state_name(yielded_value.get("next_state"))
 
-                elif instruction == "request_input":
-                    input_request_instruction = yielded_value
-                    yield input_request_instruction # Yield request input instruction to runner
-                    input_value_sent_by_runner = yield # Wait for runner input
-                    input_value = {"instruction": "runner_input", "input_data": input_value_sent_by_runner} # Prepare input for next state function
-                    continue # Continue processing current state with received input
+            elif instruction == "parent_transition":
+                parent_transition_info = yielded_value
+                engine_stack.pop() # Pop the current sub-machine from stack as it requests parent transition
+                if engine_stack: # If there is a parent machine in stack
+                    current_machine_context = engine_stack[-1] # Get parent machine context
+                    current_machine_context.current_state_name = _intern_state_name(parent_transition_info.get("next_state_for_parent")) # Set parent's next state
+                else:
+                    current_state_name = parent_transition_info.get("next_state_for_parent") # For top-level parent transition
+                continue # Process the transition in the parent machine (or top-level) in next iteration
 
-                else:  # All other instructions: notify, debug, error, warning, custom
-                    yield yielded_value # Yield other instructions to runner
-                    continue # Continue processing current state
+            elif instruction == "request_input":
+                input_request_instruction = yielded_value
+                input_value_sent_by_runner = yield input_request_instruction # One round trip: the runner's send() resumes us with its input
+                current_machine_context.pending_input = input_value_sent_by_runner
+                continue # Continue processing current state with received input
 
+            elif instruction == "debug" and not debug_mode: # Drop debug output at the source instead of round-tripping it to the runner
+                continue
 
-            else:  # Unexpected yield value
-                yield {"instruction": "runner_warning", "message": f"State function yielded unexpected value: {yielded_value}", "payload": {"yielded_value": yielded_value}}
-                instruction_result = yielded_value
+            else:  # All other instructions: notify, error, warning, custom, and debug when debug_mode is on
+                yield yielded_value # Yield other instructions to runner
                 continue # Continue processing current state
 
 
-        except StopIteration: # State function finished yielding
-            if parent_transition_info: # Check for parent transition again (though should be handled by parent_transition instruction)
-                engine_stack.pop() # Pop finished sub-machine
-                if engine_stack:
-                    current_machine_context = engine_stack[-1]
-                    current_machine_context["current_state_name"] = parent_transition_info.get("next_state_for_parent")
-                else:
-                    current_state_name = parent_transition_info.get("next_state_for_parent")
-            elif last_instruction_from_state and isinstance(last_instruction_from_state, dict) and last_instruction_from_state.get("instruction") == "transition": # Check __end__ transition
-                current_machine_context["current_state_name"] = last_instruction_from_state.get("next_state") # Transition within same machine
-            elif instruction_result and instruction_result.get("instruction") == "transition": # Regular transition
-                current_machine_context["current_state_name"] = instruction_result.get("next_state") # Transition within same machine
-            else:
-                current_machine_context["current_state_name"] = None # Halt current machine if no transition
-            current_machine_context["state_generator"] = None # Reset generator for next state or next machine in stack
-            input_value = None # Reset input for next state in sequence
-            continue # Process next state in the current machine or pop from stack if needed
-
-
-        except Exception as e: # Error in state function
-            yield {"instruction": "runner_error", "message": f"Error in state '{current_state_name}': {e}", "payload": {"exception": str(e)}}
-            current_machine_context["current_state_name"] = None # Halt current machine on error
-            current_machine_context["state_generator"] = None
-            engine_stack.pop() # Pop errored machine - could be refined to handle error propagation to parent
-            continue # Process next machine from stack or finish if stack is empty
+        else:  # Unexpected yield value
+            yield {"instruction": "runner_warning", "message": f"State function yielded unexpected value: {yielded_value}", "payload": {"yielded_value": yielded_value}}
+            continue # Continue processing current state
 
 
     yield {"instruction": "runner_notify", "message": "State machine reached '__end__' state.", "level": "info"} # Main machine reached end
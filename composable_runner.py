@@ -5,10 +5,12 @@ from composable_engine import *
 def runner(engine_generator, debug_mode=False):
     print("-" * 50 + " State Machine Execution Started " + "-" * 50) # Start delimiter
     state_transition_count = 0 # Counter for state transitions
+    value_for_engine = None # Input answering the previous request; send(None) is equivalent to next()
 
     while True:
         try:
-            instruction_for_runner = next(engine_generator)
+            instruction_for_runner = engine_generator.send(value_for_engine)
+            value_for_engine = None
             instruction_type = instruction_for_runner["instruction"]
 
             if instruction_type == "runner_notify":
@@ -30,18 +32,13 @@ def runner(engine_generator, debug_mode=False):
                 message = instruction_for_runner['message']
                 payload = instruction_for_runner.get('payload', {})
                 print(f"[DEBUG - {level}] {message}  {'Payload:' + str(payload) if payload else ''}")
-            elif instruction_type == "runner_request_input":
+            elif instruction_type in ("request_input", "runner_request_input"): # The engine forwards the state's request_input as is
                 query = instruction_for_runner.get("query", "Enter input:")
-                user_input = input(f"[INPUT REQUEST] {query} ") # Indicate input request clearly
-                engine_generator.send(user_input)
+                value_for_engine = input(f"[INPUT REQUEST] {query} ") # Delivered by the next send(), which also returns the next instruction
             elif instruction_type == "runner_custom":
                 name = instruction_for_runner['name']
                 payload = instruction_for_runner.get('payload', {})
                 print(f"[CUSTOM ACTION] Performing '{name}'  {'Payload:' + str(payload) if payload else ''}")
-            elif instruction_type == "runner_warning": # Handling runner_warning from engine for unexpected yields
-                message = instruction_for_runner['message']
-                payload = instruction_for_runner.get('payload', {})
-                print(f"[ENGINE WARNING] {message}  {'Payload:' + str(payload) if payload else ''}")
             else: # Fallback for unexpected instructions
                 print(f"[RUNNER] Received Instruction: {instruction_for_runner}  {'Payload:' + str(instruction_for_runner.get('payload', {})) if instruction_for_runner.get('payload') else ''}")
 
@@ -67,6 +64,7 @@ state_functions_interchangeable_nested_functions = {
     "state_process_input": state_process_input,
     "option_actions": create_option_actions_sub_machine,  # Assign the FUNCTION here, not the dictionary directly
     "state_complex_process": state_complex_process,
+    "state_option_one_action": state_option_one_action,  # Reached from state_complex_process once a result is confirmed
     "state_generate_report": state_generate_report,
     "__end__": state_end,
 }
@@ -5,8 +5,7 @@ import time
 def state_start(input_data=None):
     yield {"instruction": "debug", "level": "state_enter", "message": "Entering __start__ state: Initializing workflow"}
     yield {"instruction": "notify", "message": "Welcome to the Interchangeable State Machine Demo!", "level": "info"} # Updated message
-    yield {"instruction": "request_input", "query": "Please enter your name:"}
-    name = yield
+    name = yield {"instruction": "request_input", "query": "Please enter your name:"}
     if name:
         yield {"instruction": "notify", "message": f"Hello, {name}! Workflow initialized.", "level": "info"}
         yield {"instruction": "transition", "next_state": "state_process_input", "payload": {"user_name": name}}
@@ -20,18 +19,18 @@ def state_process_input(input_data=None):
     user_name = input_data.get("payload", {}).get("user_name", "Unknown User")
     yield {"instruction": "debug", "level": "state_enter", "message": "Entering state_process_input state", "payload": {"current_user": user_name}}
     yield {"instruction": "notify", "message": f"Awaiting command from {user_name}. Options: (options_menu/process/report/quit)", "level": "info"} # Updated options
-    yield {"instruction": "request_input", "query": f"Enter command for {user_name}:"}
-    command = yield
-    if command.lower() == "options_menu": # Command to trigger sub-machine - now transition to definition directly!
+    command = yield {"instruction": "request_input", "query": f"Enter command for {user_name}:"}
+    command_key = command.lower() # Lowercase once instead of once per branch
+    if command_key == "options_menu": # Command to trigger sub-machine - now transition to definition directly!
         yield {"instruction": "debug", "level": "action", "message": f"User '{user_name}' chose 'options_menu' command - invoking sub-machine"}
         yield {"instruction": "transition", "next_state": "option_actions", "payload": {"user_name": user_name}} # Transition to sub-machine DEFINITION FUNCTION
-    elif command.lower() == "process":
+    elif command_key == "process":
         yield {"instruction": "debug", "level": "action", "message": f"User '{user_name}' chose 'process' command"}
         yield {"instruction": "transition", "next_state": "state_complex_process", "payload": {"user_name": user_name}}
-    elif command.lower() == "report":
+    elif command_key == "report":
         yield {"instruction": "debug", "level": "action", "message": f"User '{user_name}' chose 'report' command"}
         yield {"instruction": "transition", "next_state": "state_generate_report", "payload": {"user_name": user_name}}
-    elif command.lower() == "quit":
+    elif command_key == "quit":
         yield {"instruction": "debug", "level": "action", "message": f"User '{user_name}' chose 'quit' command"}
         yield {"instruction": "notify", "message": f"Goodbye, {user_name}! Ending workflow.", "level": "info"}
         yield {"instruction": "transition", "next_state": "__end__"}
@@ -45,8 +44,7 @@ def state_complex_process(input_data=None):
     user_name = input_data.get("payload", {}).get("user_name", "Unknown User")
     yield {"instruction": "debug", "level": "state_enter", "message": "Entering state_complex_process state", "payload": {"current_user": user_name}}
     yield {"instruction": "notify", "message": f"Starting complex data processing for {user_name}...", "level": "info"}
-    yield {"instruction": "request_input", "query": f"Enter data file name for processing for {user_name}:"}
-    file_name = yield
+    file_name = yield {"instruction": "request_input", "query": f"Enter data file name for processing for {user_name}:"}
     if not file_name:
         yield {"instruction": "notify", "message": "No file name provided. Aborting complex process.", "level": "warning"}
         yield {"instruction": "transition", "next_state": "state_process_input", "payload": {"user_name": user_name}}
@@ -64,8 +62,7 @@ def state_complex_process(input_data=None):
     yield {"instruction": "notify", "message": f"File '{file_name}' processing completed successfully!", "level": "success", "payload": {"file": file_name, "result": processing_result}}
     yield {"instruction": "debug", "level": "action_complete", "message": f"File processing finished", "payload": {"result": processing_result}}
 
-    yield {"instruction": "request_input", "query": f"Review processing result for '{file_name}' (ok/retry):", "payload": {"result_summary": processing_result}}
-    confirmation = yield
+    confirmation = yield {"instruction": "request_input", "query": f"Review processing result for '{file_name}' (ok/retry):", "payload": {"result_summary": processing_result}}
     if confirmation.lower() == "ok":
         yield {"instruction": "notify", "message": "Processing confirmed. Proceeding to next steps.", "level": "info"}
         yield {"instruction": "transition", "next_state": "state_option_one_action", "payload": {"last_process_result": processing_result, "user_name": user_name}} # Passing processing result
@@ -109,6 +106,29 @@ def state_generate_report(input_data=None): # New state: generate report
     return
 
 
+def state_option_menu(input_data=None): # Start state of the 'option_actions' sub-machine
+    user_name = input_data.get("payload", {}).get("user_name", "Unknown User")
+    yield {"instruction": "debug", "level": "state_enter", "message": "Entering state_option_menu", "payload": {"current_user": user_name}}
+    choice = yield {"instruction": "request_input", "query": f"Choose an option for {user_name} (one/two/back):"}
+    choice_key = choice.lower()
+    if choice_key == "one":
+        yield {"instruction": "transition", "next_state": "state_option_one_action", "payload": {"user_name": user_name}}
+    elif choice_key == "two":
+        yield {"instruction": "transition", "next_state": "state_option_two_action", "payload": {"user_name": user_name}}
+    elif choice_key == "back":
+        yield {"instruction": "transition", "next_state": "__end__"} # Leave the sub-machine; its __end__ state picks the parent's next state
+    else:
+        yield {"instruction": "warning", "message": f"Invalid option: '{choice}'. Please choose one, two or back.", "payload": {"option_entered": choice}}
+        yield {"instruction": "transition", "next_state": "state_option_menu", "payload": {"user_name": user_name}} # Loop back
+    yield {"instruction": "debug", "level": "state_exit", "message": "Exiting state_option_menu"}
+    return
+
+def state_option_actions_end(input_data=None): # __end__ state of the 'option_actions' sub-machine
+    yield {"instruction": "debug", "level": "state_enter", "message": "Leaving option_actions sub-machine"}
+    yield {"instruction": "transition", "next_state": "state_process_input"} # Sets the parent's next state on sub-machine completion
+    return
+
+
 def state_end(input_data=None):
     yield {"instruction": "debug", "level": "state_enter", "message": "Entering __end__ state: Workflow termination"}
     yield {"instruction": "notify", "message": "State Machine Execution Finished. Thank you!", "level": "info"}
@@ -116,13 +136,14 @@ def state_end(input_data=None):
     yield {"instruction": "transition", "next_state": "__end__"} # Self-loop or remove transition for final halt
     return
 
-def create_option_actions_sub_machine():
+def create_option_actions_sub_machine(input_data=None):
     """Function to create and return the 'option_actions' sub-machine definition."""
     option_actions_sub_machine_definition = {
-        "__start__": state_process_input,  # Reusing state_process_input - could have dedicated sub-machine start state
+        "__start__": state_option_menu,
+        "state_option_menu": state_option_menu,
         "state_option_one_action": state_option_one_action,
         "state_option_two_action": state_option_two_action,
-        "__end__": state_end,  # Reusing state_end
-        "parent_process_input": state_process_input  # Example parent transition if needed from within sub-machine states
+        "state_process_input": state_option_menu,  # The option actions go back to 'state_process_input'; inside this sub-machine that is the menu
+        "__end__": state_option_actions_end,
     }
     return option_actions_sub_machine_definition
\ No newline at end of file
@@ -1,5 +1,13 @@
 import re
-from typing import Dict, List, Optional, Any
+import sys
+from typing import Dict, List, Any
+
+# Patterns are compiled once at import instead of going through re's pattern cache on every line
+_NODE_WITH_ATTRS_RE = re.compile(r'(\w+)\s*\[(.*?)\]')
+_NODE_RE = re.compile(r'(\w+);')
+_EDGE_RE = re.compile(r'(\w+)\s*->\s*(\w+)\s*(?:\[(.*?)\])?')
+_LABEL_ATTR_RE = re.compile(r'label\s*=\s*"([^"]*)"')
+_DATA_ATTR_RE = re.compile(r'data="(.*?)"')
 
 class DotParser:
     def parse(self, dot_content: str) -> Dict[str, Any]:
@@ -15,63 +23,51 @@ class DotParser:
                 continue
 
             # Node parsing
-            node_match = re.match(r'(\w+)\s*\[(.*?)\]', line)
+            node_match = _NODE_WITH_ATTRS_RE.match(line)
             if node_match:
-                node_id = node_match.group(1)
+                node_id = sys.intern(node_match.group(1)) # Interned: ids repeated across node and edge lines share one string object
                 attrs_str = node_match.group(2)
                 data = None
                 if attrs_str:
                     # Simple data attribute extraction - treat as a string
                     # Use a more robust regex that can handle the entire content between quotes
-                    data_match = re.search(r'data="(.*?)"', attrs_str)
+                    data_match = _DATA_ATTR_RE.search(attrs_str)
                     if data_match:
                         data = data_match.group(1)
                 nodes[node_id] = {"id": node_id, "data": data}
                 continue
             
             # Node parsing without attributes
-            node_match = re.match(r'(\w+);', line)
+            node_match = _NODE_RE.match(line)
             if node_match:
-                node_id = node_match.group(1)
+                node_id = sys.intern(node_match.group(1)) # Interned: ids repeated across node and edge lines share one string object
                 nodes[node_id] = {"id": node_id, "data": None}
                 continue
 
-            # Edge parsing with label and possibly data
-            edge_match = re.match(r'(\w+)\s*->\s*(\w+)\s*\[(.*?)\]', line)
+            # Edge parsing - one pattern for edges with and without an attribute list
+            edge_match = _EDGE_RE.match(line)
             if edge_match:
-                source = edge_match.group(1)
-                target = edge_match.group(2)
-                attrs_str = edge_match.group(3)
-                
-                # Extract label
+                source, target, attrs_str = edge_match.groups()
+                source, target = sys.intern(source), sys.intern(target) # Repeated endpoints share one string object
                 label = None
-                label_match = re.search(r'label\s*=\s*"([^"]*)"', attrs_str)
-                if label_match:
-                    label = label_match.group(1)
-                    
-                # Extract data
                 data = None
-                data_match = re.search(r'data="(.*?)"', attrs_str)
-                if data_match:
-                    data = data_match.group(1)
-                    
+                if attrs_str:
+                    # Extract label
+                    label_match = _LABEL_ATTR_RE.search(attrs_str)
+                    if label_match:
+                        label = label_match.group(1)
+
+                    # Extract data
+                    data_match = _DATA_ATTR_RE.search(attrs_str)
+                    if data_match:
+                        data = data_match.group(1)
+
                 edges.append({"source": source, "target": target, "label": label, "data": data})
                 if source not in nodes:
                     nodes[source] = {"id": source, "data": None}
                 if target not in nodes:
                     nodes[target] = {"id": target, "data": None}
                 continue
-            
-            edge_match = re.match(r'(\w+)\s*->\s*(\w+)', line)
-            if edge_match:
-                source = edge_match.group(1)
-                target = edge_match.group(2)
-                edges.append({"source": source, "target": target, "label": None, "data": None})
-                if source not in nodes:
-                    nodes[source] = {"id": source, "data": None}
-                if target not in nodes:
-                    nodes[target] = {"id": target, "data": None}
-                continue
 
         return {
             "strict": strict,
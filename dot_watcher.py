@@ -27,9 +27,9 @@ class DotFileHandler(FileSystemEventHandler):
             with open(self.dot_file_path, 'r') as f:
                 dot_content = f.read()
 
-            if dot_content == self.last_rendered_content:
+            if dot_content == self.last_rendered_content and os.path.exists(f"{self.output_png_path}.png"):
                 print("Dot file content is the same as last render, skipping PNG generation.")
-                return # Skip rendering if content is the same
+                return # Skip rendering if content is the same and the previous PNG is still on disk
 
             dot = graphviz.Source(dot_content)
             dot.render(self.output_png_path, format='png', engine='dot') # Or 'neato', 'fdp', 'sfdp', 'circo'
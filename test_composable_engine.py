@@ -0,0 +1,292 @@
+import functools
+from enum import Enum, StrEnum
+
+import pytest
+
+from composable_engine import composable_engine
+
+
+def run_to_end(engine_generator):
+    """Drive an engine without input requests and collect the instructions it yields."""
+    return list(engine_generator)
+
+
+def make_state(visited, name, *next_states):
+    """Build a state function that records its entry and yields a transition per entry of next_states."""
+    def state_function(input_data=None):
+        visited.append(name)
+        for next_state in next_states:
+            yield {"instruction": "transition", "next_state": next_state}
+    return state_function
+
+
+class StrEnumState(StrEnum):
+    NEXT = "next"
+
+
+class StrMixinState(str, Enum): # str() gives 'StrMixinState.NEXT', not the value
+    NEXT = "next"
+
+
+@pytest.mark.parametrize("State", [StrEnumState, StrMixinState])
+def test_str_enum_state_names_are_accepted(State):
+    visited = []
+
+    def state_start(input_data=None):
+        visited.append("__start__")
+        yield {"instruction": "transition", "next_state": State.NEXT}
+
+    def state_next(input_data=None):
+        visited.append("next")
+        yield {"instruction": "transition", "next_state": "__end__"}
+
+    def state_end(input_data=None):
+        yield {"instruction": "transition", "next_state": "__end__"}
+
+    run_to_end(composable_engine({"__start__": state_start, "next": state_next, "__end__": state_end}))
+    assert visited == ["__start__", "next"]
+
+
+def test_invalid_machine_is_rejected_when_engine_is_created():
+    def state_start(input_data=None):
+        yield {"instruction": "transition", "next_state": "__end__"}
+
+    with pytest.raises(ValueError, match="__end__"):
+        composable_engine({"__start__": state_start}) # No next() needed: validation runs on the call
+
+
+def test_decorated_state_function_runs_as_state():
+    calls = []
+
+    def logged(state_function):
+        @functools.wraps(state_function)
+        def wrapper(*args, **kwargs):
+            calls.append(state_function.__name__)
+            return state_function(*args, **kwargs)
+        return wrapper
+
+    @logged
+    def state_start(input_data=None):
+        yield {"instruction": "notify", "message": "decorated"}
+        yield {"instruction": "transition", "next_state": "__end__"}
+
+    def state_end(input_data=None):
+        yield {"instruction": "transition", "next_state": "__end__"}
+
+    instructions = run_to_end(composable_engine({"__start__": state_start, "__end__": state_end}))
+    assert calls == ["state_start"]
+    assert instructions[0] == {"instruction": "notify", "message": "decorated"}
+    assert instructions[-1]["instruction"] == "runner_notify"
+
+
+def test_callable_returning_neither_generator_nor_dict_is_rejected():
+    machine = {"__start__": lambda input_data=None: None, "__end__": lambda input_data=None: iter(())}
+
+    with pytest.raises(ValueError, match="Must return a generator or a sub-machine dict"):
+        run_to_end(composable_engine(machine))
+
+
+def test_last_transition_wins():
+    visited = []
+    machine = {
+        "__start__": make_state(visited, "__start__", "first", "second"),
+        "first": make_state(visited, "first", "__end__"),
+        "second": make_state(visited, "second", "__end__"),
+        "__end__": make_state(visited, "__end__"),
+    }
+
+    run_to_end(composable_engine(machine))
+    assert visited == ["__start__", "second"]
+
+
+def test_state_without_transition_halts_machine():
+    visited = []
+    machine = {
+        "__start__": make_state(visited, "__start__"),
+        "__end__": make_state(visited, "__end__"),
+    }
+
+    instructions = run_to_end(composable_engine(machine))
+    assert visited == ["__start__"]
+    assert instructions[-1]["instruction"] == "runner_notify"
+
+
+def test_completed_sub_machine_is_not_re_entered():
+    visited = []
+
+    def create_sub_machine(input_data=None):
+        return {
+            "__start__": make_state(visited, "sub.__start__", "__end__"),
+            "__end__": make_state(visited, "sub.__end__", "after"), # Sets the parent's next state
+        }
+
+    machine = {
+        "__start__": make_state(visited, "__start__", "sub"),
+        "sub": create_sub_machine,
+        "after": make_state(visited, "after", "__end__"),
+        "__end__": make_state(visited, "__end__"),
+    }
+
+    run_to_end(composable_engine(machine))
+    assert visited == ["__start__", "sub.__start__", "sub.__end__", "after"]
+
+
+def test_sub_machine_end_without_transition_halts_parent():
+    visited = []
+    machine = {
+        "__start__": make_state(visited, "__start__", "sub"),
+        "sub": {
+            "__start__": make_state(visited, "sub.__start__", "__end__"),
+            "__end__": make_state(visited, "sub.__end__"),
+        },
+        "__end__": make_state(visited, "__end__"),
+    }
+
+    run_to_end(composable_engine(machine))
+    assert visited == ["__start__", "sub.__start__", "sub.__end__"]
+
+
+def test_runner_input_is_sent_into_requesting_state():
+    received = []
+
+    def state_start(input_data=None):
+        name = yield {"instruction": "request_input", "query": "Name?"}
+        received.append(name)
+        yield {"instruction": "transition", "next_state": "__end__"}
+
+    def state_end(input_data=None):
+        yield {"instruction": "transition", "next_state": "__end__"}
+
+    engine_generator = composable_engine({"__start__": state_start, "__end__": state_end})
+    assert next(engine_generator)["instruction"] == "request_input"
+    instruction = engine_generator.send("Ada") # Resumes the state and returns the next instruction
+    assert received == ["Ada"]
+    assert instruction["instruction"] == "runner_notify" # No spurious runner_warning for a bare yield
+
+
+@pytest.mark.parametrize("debug_mode, expected", [(False, []), (True, ["debug"])])
+def test_debug_instructions_are_forwarded_only_in_debug_mode(debug_mode, expected):
+    def state_start(input_data=None):
+        yield {"instruction": "debug", "level": "state_enter", "message": "Entering __start__"}
+        yield {"instruction": "transition", "next_state": "__end__"}
+
+    def state_end(input_data=None):
+        yield {"instruction": "transition", "next_state": "__end__"}
+
+    instructions = run_to_end(composable_engine({"__start__": state_start, "__end__": state_end}, debug_mode=debug_mode))
+    assert [instruction["instruction"] for instruction in instructions[:-1]] == expected
+
+
+def test_transition_to_unknown_state_is_reported_as_runner_error():
+    visited = []
+    machine = {
+        "__start__": make_state(visited, "__start__", "missing"),
+        "__end__": make_state(visited, "__end__"),
+    }
+
+    instructions = run_to_end(composable_engine(machine))
+    assert instructions[0]["instruction"] == "runner_error"
+    assert "'missing'" in instructions[0]["message"] and "main machine" in instructions[0]["message"]
+    assert instructions[-1]["instruction"] == "runner_notify"
+
+
+def test_parent_transition_moves_parent_to_named_state():
+    visited = []
+
+    def state_leave(input_data=None):
+        visited.append("sub.__start__")
+        yield {"instruction": "parent_transition", "next_state_for_parent": "after"}
+        visited.append("sub.__start__ resumed") # Never reached: the sub-machine is left immediately
+
+    machine = {
+        "__start__": make_state(visited, "__start__", "sub"),
+        "sub": {"__start__": state_leave, "__end__": make_state(visited, "sub.__end__")},
+        "after": make_state(visited, "after", "__end__"),
+        "__end__": make_state(visited, "__end__"),
+    }
+
+    run_to_end(composable_engine(machine))
+    assert visited == ["__start__", "sub.__start__", "after"]
+
+
+def test_failing_sub_machine_halts_parent():
+    visited = []
+
+    def state_fail(input_data=None):
+        visited.append("sub.__start__")
+        raise RuntimeError("boom")
+        yield # Makes this a generator function
+
+    machine = {
+        "__start__": make_state(visited, "__start__", "sub"),
+        "sub": {"__start__": state_fail, "__end__": make_state(visited, "sub.__end__")},
+        "__end__": make_state(visited, "__end__"),
+    }
+
+    instructions = run_to_end(composable_engine(machine))
+    assert visited == ["__start__", "sub.__start__"] # Not re-entered after the failure
+    assert [instruction["instruction"] for instruction in instructions] == ["runner_error", "runner_notify"]
+
+
+def test_sub_machine_factory_is_called_on_every_entry():
+    visited = []
+    factory_calls = []
+
+    def create_sub_machine(input_data=None):
+        factory_calls.append(input_data)
+        return {
+            "__start__": make_state(visited, "sub.__start__", "__end__"),
+            "__end__": make_state(visited, "sub.__end__", "again" if len(factory_calls) == 1 else "__end__"),
+        }
+
+    machine = {
+        "__start__": make_state(visited, "__start__", "sub"),
+        "sub": create_sub_machine,
+        "again": make_state(visited, "again", "sub"),
+        "__end__": make_state(visited, "__end__"),
+    }
+
+    run_to_end(composable_engine(machine))
+    assert len(factory_calls) == 2
+    assert visited == ["__start__", "sub.__start__", "sub.__end__", "again", "sub.__start__", "sub.__end__"]
+
+
+def test_unhashable_callable_object_runs_as_state():
+    class UnhashableState:
+        __hash__ = None # Defining __eq__ without __hash__ has the same effect
+
+        def __call__(self, input_data=None):
+            yield {"instruction": "notify", "message": "called"}
+
+    def state_end(input_data=None):
+        yield {"instruction": "transition", "next_state": "__end__"}
+
+    instructions = run_to_end(composable_engine({"__start__": UnhashableState(), "__end__": state_end}))
+    assert instructions[0] == {"instruction": "notify", "message": "called"}
+
+
+def test_runner_input_does_not_leak_into_later_states():
+    received_input_data = []
+
+    def state_ask_and_leave(input_data=None):
+        yield {"instruction": "request_input", "query": "Value?"}
+        yield {"instruction": "parent_transition", "next_state_for_parent": "after"}
+
+    def state_after(input_data=None):
+        received_input_data.append(input_data)
+        yield {"instruction": "transition", "next_state": "__end__"}
+
+    def state_end(input_data=None):
+        yield {"instruction": "transition", "next_state": "__end__"}
+
+    machine = {
+        "__start__": {"__start__": state_ask_and_leave, "__end__": state_end},
+        "after": state_after,
+        "__end__": state_end,
+    }
+
+    engine_generator = composable_engine(machine)
+    assert next(engine_generator)["instruction"] == "request_input"
+    engine_generator.send("secret")
+    run_to_end(engine_generator)
+    assert received_input_data == [{"instruction_context": None}]
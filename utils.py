@@ -1,16 +1,10 @@
 import json
 
 def strip_quotes(text):
-    if text is None or not text: # Handle None and empty string explicitly
-        return text
-
-    first_char = text[0]
-    last_char = text[-1]
-
-    if (first_char == "'" and last_char == "'") or (first_char == '"' and last_char == '"'):
+    # Single pass: None/empty/unquoted text falls through unchanged
+    if text and len(text) >= 2 and text[0] in "'\"" and text[0] == text[-1]:
         return text[1:-1]
-    else:
-        return text
+    return text
 
 def parse_json_attribute(value):
     """